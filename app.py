@@ -5,66 +5,106 @@ from src.models.text_generation import TextGenerator
 from src.parsers.pdf_parser import PDFParser
 from src.parsers.docx_parser import DOCXParser
 from io import BytesIO
-from fpdf import FPDF
-from docx import Document
 from dotenv import load_dotenv
-import nltk
-from collections import Counter
-from nltk.corpus import stopwords
+import heapq
+import threading
+from collections import Counter, OrderedDict
+from itertools import filterfalse
 
-# Download NLTK stopwords if not already present
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
+# Heavy or rarely used libraries (nltk, tiktoken, fpdf, docx) are imported where they are used,
+# since Streamlit re-executes this script top to bottom on every widget interaction.
+
+# Keyword candidates: words of three or more characters (shorter ones are never keywords)
+_WORD_RE = re.compile(r'\b\w{3,}\b')
 
 load_dotenv()  # This loads environment variables from .env file
 api_key = os.getenv("OPENAI_API_KEY")
 
-# Improved chapter extraction regex
-CHAPTER_PATTERNS = [
-    r"(?:Chapter\s+(\d+)[\s:\-]+)([^\n]+)",
-    r"(?:CHAPTER\s+(\d+)[\s:\-]+)([^\n]+)",
-    r"(?:CHAPTER\s+(\d+))",
-    r"(?:Section\s+(\d+)[\s:\-]+)([^\n]+)",
-]
+# Improved chapter extraction regex: a single alternation so the text is scanned once.
+# Headings must start a line, so mentions in running text ("as we saw in chapter 1") don't count.
+CHAPTER_RE = re.compile(
+    r"^[ \t]*(?:Chapter|Section)[ \t]+(?P<num>\d+)(?:[ \t:\-]+(?P<name>[^\r\n]+))?",
+    re.IGNORECASE | re.MULTILINE,
+)
+
 
+# Chapter titles and body offsets from one scan. Each chapter runs from the end of its heading to
+# the next line-start heading matched by CHAPTER_RE, so in-text mentions of other chapters don't cut
+# it short. When a heading number appears more than once (e.g. a table of contents) the first title
+# and the longest span win. Run once per upload; results are kept in st.session_state.
 def extract_chapters(text):
-    chapters = {}
-    for pattern in CHAPTER_PATTERNS:
-        matches = re.findall(pattern, text, re.IGNORECASE)
-        for match in matches:
-            if isinstance(match, tuple) and len(match) == 2:
-                num, name = match
-                chapters[int(num)] = name.strip()
-            elif isinstance(match, str):
-                chapters[int(match)] = f"Chapter {match}"
-    return chapters
-
-# Keyword extraction using NLTK
-@st.cache_data
+    chapters, spans = {}, {}
+    matches = list(CHAPTER_RE.finditer(text))
+    for m, nxt in zip(matches, matches[1:] + [None]):
+        num = int(m.group("num"))
+        chapters.setdefault(num, (m.group("name") or f"Chapter {num}").strip())
+        start, end = m.end(), (nxt.start() if nxt else len(text))
+        if num not in spans or end - start > spans[num][1] - spans[num][0]:
+            spans[num] = (start, end)
+    return chapters, spans
+
+def get_chapter_text(full_text, chapter_num, spans):
+    span = spans.get(chapter_num)
+    if span is None:
+        return full_text
+    return full_text[span[0]:span[1]].strip() or full_text
+
+# One generator per process, shared across reruns and sessions
+@st.cache_resource
+def get_text_generator():
+    return TextGenerator()
+
+# Parsed text keyed on the uploaded bytes, so reruns don't re-parse the same file
+@st.cache_data(show_spinner="Extracting text...", max_entries=8)
+def extract_text_cached(file_bytes, file_name, max_chars=None):
+    if file_name.lower().endswith(".pdf"):
+        parser = PDFParser()
+    else:
+        parser = DOCXParser()
+    return parser.extract_text(BytesIO(file_bytes), max_chars=max_chars)
+
+# Loaded once per process rather than once per rerun; NLTK re-reads the corpus file on every words() call
+@st.cache_resource
+def get_stopwords():
+    import nltk
+    from nltk.corpus import stopwords
+
+    # Download NLTK stopwords if not already present
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords')
+    return frozenset(stopwords.words('english'))
+
+# Keyword extraction using NLTK. The cache key uses Python's built-in str hash: it covers the whole
+# text but is computed in C and memoised on the string object, so repeat lookups are near-free.
+@st.cache_data(hash_funcs={str: hash})
 def extract_keywords(text, num_keywords=10):
-    words = re.findall(r'\b\w+\b', text.lower())
-    stop_words = set(stopwords.words('english'))
-    filtered = [w for w in words if w not in stop_words and len(w) > 2]
-    most_common = Counter(filtered).most_common(num_keywords)
-    return [w for w, _ in most_common]
+    stop_words = get_stopwords()
+    # Length filtering happens in the regex and stopword filtering in filterfalse, so counting runs in C
+    counts = Counter(filterfalse(stop_words.__contains__, _WORD_RE.findall(text.lower())))
+    # Top-K over the words themselves: O(V log K), with no (word, count) pairs to build and unpack
+    return heapq.nlargest(num_keywords, counts, key=counts.__getitem__)
 
 
 def export_to_pdf(text, filename="output.pdf"):
+    from fpdf import FPDF
+
     pdf = FPDF()
     pdf.add_page()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.set_font("Arial", size=12)
-    for line in text.split('\n'):
-        pdf.multi_cell(0, 10, line)
-    pdf_output = pdf.output(dest='S').encode('latin1')
-    pdf_buffer = BytesIO(pdf_output)
+    # fpdf2 breaks on newlines itself and writes the document bytes straight into the buffer
+    pdf.multi_cell(0, 10, text)
+    pdf_buffer = BytesIO()
+    pdf.output(pdf_buffer)
     pdf_buffer.seek(0)
     return pdf_buffer
 
 
 def export_to_word(text, filename="output.docx"):
+    from docx import Document
+
     doc = Document()
     doc.add_paragraph(text)
     doc_buffer = BytesIO()
@@ -73,34 +113,288 @@ def export_to_word(text, filename="output.docx"):
     return doc_buffer
 
 
-def chatbot_response(user_input, extracted_text, chapters, content_type, selected_chapter=None):
+def _chat_export_lines(entries):
+    # Most recent exchange first, matching the on-screen history
+    lines = []
+    for user, bot, chapter in reversed(entries):
+        chapter_info = f" (Chapter {chapter})" if chapter else ""
+        lines += (f"You{chapter_info}: {user}", f"Curriculens: {bot}", "")
+    return lines
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def chat_history_to_text(entries):
+    return "\n".join(_chat_export_lines(entries))
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def chat_history_to_word(entries):
+    from docx import Document
+
+    doc = Document()
+    for line in _chat_export_lines(entries):
+        doc.add_paragraph(line)
+    buf = BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+TASK_INSTRUCTIONS = {
+    "Lesson Plan": (
+        "Generate a detailed, well-structured lesson plan for the following content. "
+        "Include: Title, Grade Level, Objectives, Materials, Procedure (with Introduction, Direct Instruction, Guided Practice, Independent Practice, Assessment), and Conclusion. "
+        "Ensure each section is complete and do not end mid-sentence. Use dashes (-) for lists instead of asterisks (*)."
+    ),
+    "MCQs": "Generate multiple choice questions for the following content:",
+    "Short Questions": "Generate short answer questions for the following content:",
+    "Summarize": "Summarize the following content:",
+}
+LLM_TASKS = list(TASK_INSTRUCTIONS)
+
+CHAT_PROMPT = """You are an educational assistant. The user uploaded the following content:
+
+{context}
+
+User question: {user_input}
+
+Please provide a clear, concise and helpful answer based on the above content."""
+
+# Split after sentence-ending punctuation, keeping the whitespace with the next sentence
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])(?=\s)")
+
+# Context sent with each prompt: about the size of the old 3000-character slice, which keeps
+# prefill (and time to first token) short. The margin covers chat-template tokens and the gap
+# between cl100k_base counts and the model's own tokenizer.
+CONTEXT_TOKEN_CAP = 1000
+CONTEXT_TOKEN_MARGIN = 256
+
+
+@st.cache_resource
+def get_tokenizer():
+    import tiktoken
+
+    # tiktoken has no Llama 3 encoding; cl100k_base is a close approximation of its token counts
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def fit_context(text, prompt_without_context, task=None, focus_keywords=False):
+    # Trim text on sentence boundaries to CONTEXT_TOKEN_CAP tokens, or fewer if the prompt and the
+    # model's reply would otherwise not fit in the context window.
+    # With focus_keywords, keep the window with the most document keywords instead of the head.
+    enc = get_tokenizer()
+    tg = get_text_generator()
+    room = tg.context_window - len(enc.encode(prompt_without_context)) - tg.output_budget(task)
+    budget = min(CONTEXT_TOKEN_CAP, room - CONTEXT_TOKEN_MARGIN)
+    if len(enc.encode(text)) <= budget:
+        return text
+
+    sentences = _SENTENCE_SPLIT_RE.split(text)
+    costs = [len(enc.encode(s)) for s in sentences]
+    start = 0
+    if focus_keywords:
+        keywords = frozenset(extract_keywords(text))
+        scores = [sum(w in keywords for w in _WORD_RE.findall(s.lower())) for s in sentences]
+        # Sliding window over sentences that fits the budget, keeping the best-scoring start
+        best_score, lo, tokens, score = -1, 0, 0, 0
+        for hi in range(len(sentences)):
+            tokens += costs[hi]
+            score += scores[hi]
+            while tokens > budget:
+                tokens -= costs[lo]
+                score -= scores[lo]
+                lo += 1
+            if lo <= hi and score > best_score:
+                best_score, start = score, lo
+
+    kept, used = [], 0
+    for sentence, cost in zip(sentences[start:], costs[start:]):
+        if used + cost > budget:
+            break
+        kept.append(sentence)
+        used += cost
+    if not kept:
+        # A single sentence longer than the budget: fall back to a hard token cut
+        return enc.decode(enc.encode(sentences[start])[:max(budget, 0)])
+    return "".join(kept).strip()
+
+
+def build_task_prompt(task, chapter_text, focus_keywords=False):
+    instruction = TASK_INSTRUCTIONS[task]
+    context = fit_context(chapter_text, f"{instruction}\n\n", task, focus_keywords)
+    return f"{instruction}\n\n{context}"
+
+
+CHAT_CACHE_SIZE = 256
+
+
+# Finished answers by prompt, shared across reruns and sessions. A plain LRU rather than
+# st.cache_data, which would record and replay every partial render made by st.write_stream.
+@st.cache_resource
+def _chat_answer_cache():
+    return OrderedDict(), threading.Lock()
+
+
+def _cached_llm(prompt):
+    # Identical prompts (re-asked questions, reruns) are answered from cache instead of the API
+    cache, lock = _chat_answer_cache()
+    with lock:
+        if prompt in cache:
+            cache.move_to_end(prompt)
+            return cache[prompt]
+    # Render tokens as they arrive on a miss; write_stream returns the full response text
+    # API failures raise out of the stream, so they never reach the cache
+    response = st.write_stream(get_text_generator().generate_text_stream(prompt))
+    with lock:
+        cache[prompt] = response
+        if len(cache) > CHAT_CACHE_SIZE:
+            cache.popitem(last=False)
+    return response
+
+
+def chatbot_response(user_input, extracted_text, chapters, content_type, selected_chapter=None, spans=None):
     context = ""
+    focus_keywords = False
 
     if content_type == "Book" and selected_chapter and selected_chapter in chapters:
-        chapter_title = f"Chapter {selected_chapter}: {chapters[selected_chapter]}"
-        pattern = re.compile(
-            rf"{re.escape(chapter_title)}(.*?)(Chapter\s+\d+:|$)", re.DOTALL | re.IGNORECASE
-        )
-        match = pattern.search(extracted_text)
-        if match:
-            context = match.group(1).strip()
-        else:
-            context = extracted_text
+        context = get_chapter_text(extracted_text, selected_chapter, spans or {})
+        focus_keywords = True
     else:
         context = extracted_text
 
-    context = context[:3000]
+    context = fit_context(
+        context, CHAT_PROMPT.format(context="", user_input=user_input), focus_keywords=focus_keywords
+    )
+    prompt = CHAT_PROMPT.format(context=context, user_input=user_input)
+    return _cached_llm(prompt)
 
-    prompt = f"""You are an educational assistant. The user uploaded the following content:
 
-{context}
+# The two columns are fragments: interacting with one reruns only that column,
+# not the upload/chapter detection above or the other column.
+@st.fragment
+def generate_panel(content_type):
+    st.header("📌 Generate Content")
+    task = st.selectbox("Select task", LLM_TASKS + ["Extract Keywords"])
+    export_format = st.selectbox("Select export format", ["PDF", "Word"])
+    selected_chapter = None
+    chapter_text = st.session_state.extracted_text
+    if content_type == "Book" and st.session_state.chapters:
+        chapter_options = [f"Chapter {num}: {name}" for num, name in st.session_state.chapters.items()]
+        chapter_choice = st.selectbox("Select chapter (optional)", ["All"] + chapter_options)
+        if chapter_choice != "All":
+            selected_chapter = int(chapter_choice.split()[1].replace(":", ""))
+            # Extract only the selected chapter's text
+            chapter_text = get_chapter_text(st.session_state.extracted_text, selected_chapter, st.session_state.chapter_spans)
+    if st.button("Generate"):
+        progress = st.progress(0, text="Generating content...")
+        result = None
+        try:
+            with st.spinner("Generating content..."):
+                progress.progress(10)
+                if task == "Extract Keywords":
+                    keywords = extract_keywords(chapter_text)
+                    result = "Keywords: " + ", ".join(keywords)
+                else:
+                    prompt = build_task_prompt(task, chapter_text, selected_chapter is not None)
+                    tg = get_text_generator()
+                    progress.progress(30)
+                    # Stream into a placeholder, then show the final (post-processed) text that gets exported
+                    stream_area = st.empty()
+                    try:
+                        with stream_area.container():
+                            result = st.write_stream(tg.generate_text_stream(prompt, task=task))
+                    finally:
+                        stream_area.empty()
+                    if task == "Lesson Plan":
+                        # Post-process: replace asterisks with dashes for cleaner formatting
+                        result = result.replace("* ", "- ")
+                progress.progress(90)
+                st.text_area("Generated Content", value=result, height=200)
+                st.session_state.all_generated.append(result)
+                progress.progress(100)
+        except Exception as e:
+            st.error(f"Error during content generation: {e}")
 
-User question: {user_input}
+        # Download only the most recent generated content (nothing to download if generation failed)
+        if result is not None:
+            if export_format == "PDF":
+                if st.download_button("Download PDF", export_to_pdf(result), file_name="generated_content.pdf"):
+                    st.success("PDF download started!")
+            else:
+                if st.download_button("Download Word", export_to_word(result), file_name="generated_content.docx"):
+                    st.success("Word download started!")
+
+    # Run several LLM tasks at once; the requests are issued concurrently
+    batch_tasks = st.multiselect("Generate several at once (optional)", LLM_TASKS)
+    if st.button("Generate All", disabled=not batch_tasks):
+        try:
+            with st.spinner("Generating content..."):
+                prompts = [build_task_prompt(t, chapter_text, selected_chapter is not None) for t in batch_tasks]
+                results = get_text_generator().generate_batch(prompts, tasks=batch_tasks)
+            results = [r.replace("* ", "- ") if t == "Lesson Plan" else r for t, r in zip(batch_tasks, results)]
+            for t, r in zip(batch_tasks, results):
+                st.text_area(t, value=r, height=200)
+            st.session_state.all_generated.extend(results)
+            combined = "\n\n".join(results)
+            if export_format == "PDF":
+                st.download_button("Download PDF", export_to_pdf(combined), file_name="generated_content.pdf", key="batch_pdf")
+            else:
+                st.download_button("Download Word", export_to_word(combined), file_name="generated_content.docx", key="batch_word")
+        except Exception as e:
+            st.error(f"Error during content generation: {e}")
 
-Please provide a clear, concise and helpful answer based on the above content."""
 
-    text_generator = TextGenerator()
-    return text_generator.generate_text(prompt)
+@st.fragment
+def chat_panel(content_type):
+    st.header("🤖 Curriculens")
+    selected_chapter = None
+    if content_type == "Book" and st.session_state.chapters:
+        chapter_options = [f"Chapter {num}: {name}" for num, name in st.session_state.chapters.items()]
+        chapter_choice = st.selectbox("Chat about chapter (optional)", ["All"] + chapter_options, key="chat_chapter")
+        if chapter_choice != "All":
+            selected_chapter = int(chapter_choice.split()[1].replace(":", ""))
+    user_input = st.text_input("You:", key="chat_input")
+    if user_input:
+        progress = st.progress(0, text="Generating response...")
+        try:
+            with st.spinner("Generating response..."):
+                progress.progress(10)
+                # Stream into a placeholder; the finished answer is shown in Chat History below
+                stream_area = st.empty()
+                try:
+                    with stream_area.container():
+                        response = chatbot_response(user_input, st.session_state.extracted_text, st.session_state.chapters, content_type, selected_chapter, st.session_state.chapter_spans)
+                finally:
+                    # Also clear a partial stream when the request fails midway
+                    stream_area.empty()
+                progress.progress(90)
+                st.session_state.chat_history.append({"user": user_input, "bot": response, "chapter": selected_chapter})
+                progress.progress(100)
+        except Exception as e:
+            st.error(f"Error during chat response: {e}")
+    # Clean, ordered chat history display (most recent at top)
+    st.markdown("#### Chat History")
+    for i, entry in enumerate(reversed(st.session_state.chat_history)):
+        chapter_info = f" (Chapter {entry['chapter']})" if entry['chapter'] else ""
+        st.markdown(f"**You{chapter_info}:** {entry['user']}")
+        st.markdown(f"**Curriculens:** {entry['bot']}")
+        st.markdown("---")
+    # Export chat history; the builders are cached on the history contents, so reruns
+    # that don't add a message reuse the previous TXT/DOCX instead of rebuilding them
+    entries = tuple((e["user"], e["bot"], e["chapter"]) for e in st.session_state.chat_history)
+    st.markdown("**Export Chat History:**")
+    st.download_button("Download as TXT", chat_history_to_text(entries), file_name="chat_history.txt")
+    st.download_button("Download as Word", chat_history_to_word(entries), file_name="chat_history.docx")
+
+
+# Per-session state and its initial value. Factories rather than values, so every session gets
+# its own list/dict instead of sharing one module-level object.
+SESSION_DEFAULTS = {
+    "extracted_text": lambda: None,
+    "chapters": dict,
+    "chapter_spans": dict,
+    "chat_history": list,
+    "all_generated": list,
+}
 
 
 def main():
@@ -132,19 +426,13 @@ def main():
             """)
         with st.expander("Reset", expanded=False):
             if st.button("Reset Session"):
-                for key in ["extracted_text", "chapters", "chat_history", "all_generated"]:
+                for key in SESSION_DEFAULTS:
                     if key in st.session_state:
                         del st.session_state[key]
                 st.rerun()
 
-    if "extracted_text" not in st.session_state:
-        st.session_state.extracted_text = None
-    if "chapters" not in st.session_state:
-        st.session_state.chapters = {}
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
-    if "all_generated" not in st.session_state:
-        st.session_state.all_generated = []
+    for key, factory in SESSION_DEFAULTS.items():
+        st.session_state.setdefault(key, factory())
 
     content_type = st.radio("What are you uploading?", ["Syllabus", "Book"])
 
@@ -153,29 +441,27 @@ def main():
     # Limit input size for uploaded files
     MAX_CHARS = 12000  # adjust as needed for model/Spaces
     if uploaded_file is not None:
-        with st.spinner("Extracting text..."):
-            try:
-                if uploaded_file.name.lower().endswith(".pdf"):
-                    parser = PDFParser()
-                elif uploaded_file.name.lower().endswith(".docx"):
-                    parser = DOCXParser()
-                else:
-                    st.error("Unsupported file type.")
-                    return
-                extracted_text = parser.extract_text(uploaded_file)
-                if len(extracted_text) > MAX_CHARS:
-                    st.warning(f"Uploaded document is large. Only the first {MAX_CHARS} characters will be used.")
-                    extracted_text = extracted_text[:MAX_CHARS]
-                st.session_state.extracted_text = extracted_text
-                st.success("✅ File uploaded and text extracted!")
-            except Exception as e:
-                st.error(f"Error extracting text: {e}")
-                return
+        if not uploaded_file.name.lower().endswith((".pdf", ".docx")):
+            st.error("Unsupported file type.")
+            return
+        try:
+            # Parse one character past the limit so we can tell whether the document was cut short
+            extracted_text = extract_text_cached(uploaded_file.getvalue(), uploaded_file.name, MAX_CHARS + 1)
+            if len(extracted_text) > MAX_CHARS:
+                st.warning(f"Uploaded document is large. Only the first {MAX_CHARS} characters will be used.")
+                extracted_text = extracted_text[:MAX_CHARS]
+            if extracted_text != st.session_state.extracted_text:
+                # New document: detect its chapters once; titles and offsets are always written together
+                st.session_state.chapters, st.session_state.chapter_spans = extract_chapters(extracted_text)
+            st.session_state.extracted_text = extracted_text
+            st.success("✅ File uploaded and text extracted!")
+        except Exception as e:
+            st.error(f"Error extracting text: {e}")
+            return
 
         if content_type == "Book":
-            chapters = extract_chapters(extracted_text)
+            chapters = st.session_state.chapters
             if chapters:
-                st.session_state.chapters = chapters
                 st.subheader("📖 Detected Chapters")
                 for num, name in chapters.items():
                     st.markdown(f"- **Chapter {num}:** {name}")
@@ -186,122 +472,9 @@ def main():
     if st.session_state.extracted_text:
         col1, col2 = st.columns([2, 1])
         with col1:
-            st.header("📌 Generate Content")
-            task = st.selectbox("Select task", ["Lesson Plan", "MCQs", "Short Questions", "Summarize", "Extract Keywords"])
-            export_format = st.selectbox("Select export format", ["PDF", "Word"])
-            selected_chapter = None
-            chapter_text = st.session_state.extracted_text
-            if content_type == "Book" and st.session_state.chapters:
-                chapter_options = [f"Chapter {num}: {name}" for num, name in st.session_state.chapters.items()]
-                chapter_choice = st.selectbox("Select chapter (optional)", ["All"] + chapter_options)
-                if chapter_choice != "All":
-                    selected_chapter = int(chapter_choice.split()[1].replace(":", ""))
-                    # Extract only the selected chapter's text
-                    chapter_title = f"Chapter {selected_chapter}: {st.session_state.chapters[selected_chapter]}"
-                    pattern = re.compile(rf"{re.escape(chapter_title)}(.*?)(Chapter\\s+\\d+:|$)", re.DOTALL | re.IGNORECASE)
-                    match = pattern.search(st.session_state.extracted_text)
-                    if match:
-                        chapter_text = match.group(1).strip()
-                    else:
-                        chapter_text = st.session_state.extracted_text
-            if st.button("Generate"):
-                progress = st.progress(0, text="Generating content...")
-                try:
-                    with st.spinner("Generating content..."):
-                        progress.progress(10)
-                        if task == "Extract Keywords":
-                            keywords = extract_keywords(chapter_text)
-                            result = "Keywords: " + ", ".join(keywords)
-                        elif task == "Summarize":
-                            prompt = f"Summarize the following content:\n\n{chapter_text[:3000]}"
-                            tg = TextGenerator()
-                            progress.progress(30)
-                            result = tg.generate_text(prompt, task=task)
-                        elif task == "Lesson Plan":
-                            prompt = (
-                                "Generate a detailed, well-structured lesson plan for the following content. "
-                                "Include: Title, Grade Level, Objectives, Materials, Procedure (with Introduction, Direct Instruction, Guided Practice, Independent Practice, Assessment), and Conclusion. "
-                                "Ensure each section is complete and do not end mid-sentence. Use dashes (-) for lists instead of asterisks (*).\n\n"
-                                f"{chapter_text[:3000]}"
-                            )
-                            tg = TextGenerator()
-                            progress.progress(30)
-                            result = tg.generate_text(prompt, task=task)
-                            # Post-process: replace asterisks with dashes for cleaner formatting
-                            result = result.replace("* ", "- ")
-                        else:
-                            prompt_map = {
-                                "MCQs": "Generate multiple choice questions for the following content:",
-                                "Short Questions": "Generate short answer questions for the following content:"
-                            }
-                            prompt = f"{prompt_map[task]}\n\n{chapter_text[:3000]}"
-                            tg = TextGenerator()
-                            progress.progress(30)
-                            result = tg.generate_text(prompt, task=task)
-                        progress.progress(90)
-                        st.text_area("Generated Content", value=result, height=200)
-                        st.session_state.all_generated.append(result)
-                        progress.progress(100)
-                except Exception as e:
-                    st.error(f"Error during content generation: {e}")
-
-                # Download only the most recent generated content
-                if export_format == "PDF":
-                    if st.download_button("Download PDF", export_to_pdf(result), file_name="generated_content.pdf"):
-                        st.success("PDF download started!")
-                else:
-                    if st.download_button("Download Word", export_to_word(result), file_name="generated_content.docx"):
-                        st.success("Word download started!")
+            generate_panel(content_type)
         with col2:
-            st.header("🤖 Curriculens")
-            selected_chapter = None
-            if content_type == "Book" and st.session_state.chapters:
-                chapter_options = [f"Chapter {num}: {name}" for num, name in st.session_state.chapters.items()]
-                chapter_choice = st.selectbox("Chat about chapter (optional)", ["All"] + chapter_options, key="chat_chapter")
-                if chapter_choice != "All":
-                    selected_chapter = int(chapter_choice.split()[1].replace(":", ""))
-            user_input = st.text_input("You:", key="chat_input")
-            if user_input:
-                progress = st.progress(0, text="Generating response...")
-                try:
-                    with st.spinner("Generating response..."):
-                        progress.progress(10)
-                        response = chatbot_response(user_input, st.session_state.extracted_text, st.session_state.chapters, content_type, selected_chapter)
-                        progress.progress(90)
-                        st.session_state.chat_history.append({"user": user_input, "bot": response, "chapter": selected_chapter})
-                        progress.progress(100)
-                except Exception as e:
-                    st.error(f"Error during chat response: {e}")
-            # Clean, ordered chat history display (most recent at top)
-            st.markdown("#### Chat History")
-            for i, entry in enumerate(reversed(st.session_state.chat_history)):
-                chapter_info = f" (Chapter {entry['chapter']})" if entry['chapter'] else ""
-                st.markdown(f"**You{chapter_info}:** {entry['user']}")
-                st.markdown(f"**Curriculens:** {entry['bot']}")
-                st.markdown("---")
-            # Export chat history
-            def chat_history_to_text():
-                lines = []
-                for entry in reversed(st.session_state.chat_history):
-                    chapter_info = f" (Chapter {entry['chapter']})" if entry['chapter'] else ""
-                    lines.append(f"You{chapter_info}: {entry['user']}")
-                    lines.append(f"Curriculens: {entry['bot']}")
-                    lines.append("")
-                return "\n".join(lines)
-            def chat_history_to_word():
-                doc = Document()
-                for entry in reversed(st.session_state.chat_history):
-                    chapter_info = f" (Chapter {entry['chapter']})" if entry['chapter'] else ""
-                    doc.add_paragraph(f"You{chapter_info}: {entry['user']}")
-                    doc.add_paragraph(f"Curriculens: {entry['bot']}")
-                    doc.add_paragraph("")
-                buf = BytesIO()
-                doc.save(buf)
-                buf.seek(0)
-                return buf
-            st.markdown("**Export Chat History:**")
-            st.download_button("Download as TXT", chat_history_to_text(), file_name="chat_history.txt")
-            st.download_button("Download as Word", chat_history_to_word(), file_name="chat_history.docx")
+            chat_panel(content_type)
 
 if __name__ == "__main__":
     main()
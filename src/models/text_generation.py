@@ -1,16 +1,42 @@
 import os
+import json
+import queue
 import requests
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 class TextGenerator:
     def __init__(self):
         self.api_key = os.getenv("GROQ_API_KEY")
         self.api_url = "https://api.groq.com/openai/v1/chat/completions"
         self.model = "llama3-8b-8192"  # You can use other models Groq supports
+        self.context_window = 8192  # Prompt + completion token limit for the model above
+        self.timeout = 60  # Seconds to wait for the API to connect or send the next chunk
+        # requests.Session isn't thread-safe and this instance is shared by every Streamlit script
+        # thread, so each call checks a session out of this pool for its exclusive use. Idle sessions
+        # (and their open HTTPS connections) are handed to the next call, whichever thread makes it.
+        self._sessions = queue.LifoQueue()
+        self._executor = ThreadPoolExecutor(max_workers=8)  # Long-lived, for generate_batch
 
-    def generate_text(self, prompt, max_tokens=256, task=None):
+    @contextmanager
+    def _session(self):
+        try:
+            session = self._sessions.get_nowait()
+        except queue.Empty:
+            session = requests.Session()
+        try:
+            yield session
+        finally:
+            self._sessions.put(session)
+
+    def output_budget(self, task=None, max_tokens=256):
         # Use a higher max_tokens for lesson plans
         if task == "Lesson Plan":
-            max_tokens = 800
+            return 800
+        return max_tokens
+
+    def _build_request(self, prompt, max_tokens, task, stream=False):
+        max_tokens = self.output_budget(task, max_tokens)
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -22,8 +48,46 @@ class TextGenerator:
             ],
             "max_tokens": max_tokens
         }
-        response = requests.post(self.api_url, headers=headers, json=data)
-        if response.status_code == 200:
-            return response.json()["choices"][0]["message"]["content"]
-        else:
-            return f"Error: {response.text}"
\ No newline at end of file
+        if stream:
+            data["stream"] = True
+        return headers, data
+
+    def _check_response(self, response):
+        # Raise rather than return the error body, so failures can't be mistaken for generated text
+        if response.status_code != 200:
+            raise requests.HTTPError(
+                f"API request failed ({response.status_code}): {response.text}", response=response
+            )
+
+    def generate_text(self, prompt, max_tokens=256, task=None):
+        headers, data = self._build_request(prompt, max_tokens, task)
+        with self._session() as session:
+            response = session.post(self.api_url, headers=headers, json=data, timeout=self.timeout)
+        self._check_response(response)
+        return response.json()["choices"][0]["message"]["content"]
+
+    def generate_text_stream(self, prompt, max_tokens=256, task=None):
+        # Yields the response piece by piece as the API sends server-sent events
+        headers, data = self._build_request(prompt, max_tokens, task, stream=True)
+        with self._session() as session, session.post(
+            self.api_url, headers=headers, json=data, stream=True, timeout=self.timeout
+        ) as response:
+            self._check_response(response)
+            # Work on raw bytes: requests would decode a charset-less text/event-stream as
+            # ISO-8859-1, while json.loads reads the UTF-8 payload bytes correctly
+            for line in response.iter_lines():
+                if not line.startswith(b"data: "):
+                    continue
+                payload = line[len(b"data: "):]
+                if payload == b"[DONE]":
+                    break
+                delta = json.loads(payload)["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    yield delta["content"]
+
+    def generate_batch(self, prompts, max_tokens=256, tasks=None):
+        # Send all prompts concurrently so N requests cost about one round trip; order is preserved
+        tasks = tasks or [None] * len(prompts)
+        return list(self._executor.map(
+            lambda prompt, task: self.generate_text(prompt, max_tokens, task), prompts, tasks
+        ))
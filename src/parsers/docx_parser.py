@@ -1,11 +1,15 @@
 class DOCXParser:
-    def extract_text(self, docx_file):
+    def extract_text(self, docx_file, max_chars=None):
         from docx import Document
         
         doc = Document(docx_file)
         text = []
+        total = 0
         
         for paragraph in doc.paragraphs:
             text.append(paragraph.text)
+            total += len(paragraph.text) + 1
+            if max_chars is not None and total >= max_chars:
+                break
         
-        return '\n'.join(text)
\ No newline at end of file
+        return '\n'.join(text)[:max_chars]
\ No newline at end of file
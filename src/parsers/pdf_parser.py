@@ -1,10 +1,25 @@
-import PyPDF2
+import threading
+import pypdfium2 as pdfium
+
+# PDFium is not thread-safe, not even across separate documents, and Streamlit runs each
+# session's script in its own thread; only one thread may use it at a time
+_PDFIUM_LOCK = threading.Lock()
 
 class PDFParser:
-    def extract_text(self, pdf_file):
-        # pdf_file is a file-like object (Streamlit UploadedFile)
-        reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        return text
\ No newline at end of file
+    def extract_text(self, pdf_file, max_chars=None):
+        # pdf_file is a file-like object (Streamlit UploadedFile / BytesIO) or raw bytes
+        data = pdf_file.read() if hasattr(pdf_file, "read") else pdf_file
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(data)
+            try:
+                # With a character budget, stop reading pages as soon as it is reached
+                parts = []
+                total = 0
+                for i in range(len(pdf)):
+                    parts.append(pdf[i].get_textpage().get_text_range())
+                    total += len(parts[-1]) + 1
+                    if max_chars is not None and total >= max_chars:
+                        break
+            finally:
+                pdf.close()
+        return "\n".join(parts)[:max_chars]